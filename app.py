@@ -1,24 +1,19 @@
 import streamlit as st
 import json
 import os
+import threading
+from collections import Counter
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime
+from datetime import date
 from extractor.pdf_reader import extract_text_from_bytes, read_file_content
-from extractor.obligation_extractor import extract_obligations_from_text
-from extractor.deadline_parser import get_compliance_status
-from utils.risk_scoring import update_obligation_risks, get_high_risk_obligations, get_upcoming_deadlines
+from extractor.obligation_extractor import extract_obligations_from_file, extract_obligations_from_text
+from extractor.deadline_parser import SENTINEL_DEADLINES
+from utils.risk_scoring import update_obligation_risks
 
 
-# Set page configuration
-st.set_page_config(
-    page_title="AI Loan Obligation & Covenant Tracker",
-    page_icon="📋",
-    layout="wide"
-)
-
-# Custom CSS for styling
-st.markdown("""
+# Page styles
+CSS_BLOCK = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -66,7 +61,135 @@ st.markdown("""
         background-color: #fee2e2;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Table cell styles keyed by compliance status and risk level
+STATUS_STYLES = {
+    'Compliant': 'background-color: #d1fae5; color: #065f46',
+    'Due Soon': 'background-color: #fef3c7; color: #92400e',
+    'Missed': 'background-color: #fee2e2; color: #991b1b'
+}
+
+RISK_STYLES = {
+    'High': 'background-color: #fee2e2; color: #991b1b; font-weight: bold',
+    'Medium': 'background-color: #fef3c7; color: #92400e',
+    'Low': 'background-color: #d1fae5; color: #065f46'
+}
+
+
+# Cached computations - Streamlit re-executes this script on every widget
+# interaction, so anything derived purely from its inputs is memoized here
+@st.cache_data(show_spinner=False)
+def _load_sample(path: str, mtime: float) -> str:
+    """Reads the sample agreement; the modification time invalidates the cache."""
+    return read_file_content(path)
+
+
+@st.cache_data(show_spinner=False)
+def _extract(text: str, today: date) -> list:
+    """
+    Extracts obligations from loan agreement text.
+    
+    Deadlines are calculated from today, so the date is part of the cache
+    key; results cached on an earlier day are never reused.
+    """
+    return extract_obligations_from_text(text, today)
+
+
+@st.cache_data(show_spinner=False)
+def _extract_file(path: str, mtime: float, today: date) -> list:
+    """
+    Extracts obligations from an agreement file, probing it for obligation
+    keywords before decoding; the modification time invalidates the cache.
+    """
+    return extract_obligations_from_file(path, today)
+
+
+@st.cache_resource
+def _persist_lock() -> threading.Lock:
+    """Returns the lock serializing writes of the extracted obligations file."""
+    return threading.Lock()
+
+
+def _persist_obligations(obligations: list, lock: threading.Lock,
+                         path: str = "data/extracted_obligations.json") -> None:
+    """Saves obligations to JSON; meant to run off the Streamlit script thread."""
+    with lock:
+        with open(path, "w") as f:
+            json.dump(obligations, f, indent=2, default=str)
+
+
+def _build_display_df(obligations: list) -> pd.DataFrame:
+    """
+    Builds the obligations table shown on the dashboard.
+    
+    Not cached: hashing the obligations for a cache key costs far more
+    than building the table from them.
+    """
+    descriptions = pd.Series([ob['description'] for ob in obligations], dtype=object)
+    
+    return pd.DataFrame({
+        'ID': [ob['id'] for ob in obligations],
+        'Type': [ob['type'] for ob in obligations],
+        'Description': descriptions.where(descriptions.str.len() <= 100, descriptions.str[:97] + "..."),
+        'Frequency': [ob['frequency'] for ob in obligations],
+        'Deadline Rule': [ob['deadline_rule'] for ob in obligations],
+        'Next Deadline': [ob['next_deadline'] for ob in obligations],
+        'Risk Level': [ob['risk_category'] for ob in obligations],
+        'Status': [ob['compliance_status'] for ob in obligations]
+    })
+
+
+def _dashboard_counts(obligations: list) -> tuple:
+    """
+    Counts obligations by compliance status and by risk category in one pass.
+    
+    Not cached: hashing the obligations for a cache key would cost as much
+    as counting them.
+    """
+    status_counts = Counter()
+    risk_counts = Counter()
+    for ob in obligations:
+        status_counts[ob['compliance_status']] += 1
+        risk_counts[ob['risk_category']] += 1
+    
+    return status_counts, risk_counts
+
+
+def _build_risk_chart(risk_counts: dict) -> "alt.Chart":
+    """Builds the risk distribution pie chart from risk level counts."""
+    # Imported here so the first page load does not pay for altair
+    import altair as alt
+    
+    levels = list(risk_counts)
+    chart_data = pd.DataFrame({'Risk Level': levels, 'Count': list(risk_counts.values())})
+    return alt.Chart(chart_data, title='Risk Level Distribution').mark_arc().encode(
+        theta='Count:Q',
+        color=alt.Color('Risk Level:N', sort=levels,
+                        scale=alt.Scale(domain=levels, range=['#ef4444', '#f59e0b', '#10b981'])),
+        tooltip=['Risk Level', 'Count']
+    )
+
+
+def _high_risk_card_class(ob: dict) -> str:
+    """Returns the CSS classes for a high-risk obligation card."""
+    if ob['compliance_status'] == 'Due Soon':
+        return "high-risk due-soon"
+    elif ob['compliance_status'] == 'Missed':
+        return "high-risk missed"
+    return "high-risk"
+
+
+# Set page configuration
+st.set_page_config(
+    page_title="AI Loan Obligation & Covenant Tracker",
+    page_icon="📋",
+    layout="wide"
+)
+
+# Custom CSS for styling. Streamlit drops any element a rerun does not
+# emit again, so this has to be injected on every run rather than once
+st.markdown(CSS_BLOCK, unsafe_allow_html=True)
 
 # App title and header
 st.markdown('<div class="main-header">AI Loan Obligation & Covenant Tracker</div>', unsafe_allow_html=True)
@@ -123,10 +246,10 @@ with col1:
     
     elif input_option == "Use Sample Agreement":
         sample_path = "data/sample_loan_agreement.txt"
-        if os.path.exists(sample_path):
-            text_input = read_file_content(sample_path)
+        try:
+            text_input = _load_sample(sample_path, os.path.getmtime(sample_path))
             st.info("Sample loan agreement loaded!")
-        else:
+        except FileNotFoundError:
             st.warning("Sample agreement not found. Please create data/sample_loan_agreement.txt")
 
 # Process button
@@ -136,27 +259,34 @@ if st.button("🔍 Extract Obligations", disabled=(text_input == "")):
         with st.spinner("Processing loan agreement..."):
             try:
                 # Extract obligations
-                obligations = extract_obligations_from_text(text_input)
+                today = date.today()
+                if input_option == "Use Sample Agreement":
+                    obligations = _extract_file(sample_path, os.path.getmtime(sample_path), today)
+                else:
+                    obligations = _extract(text_input, today)
                 
-                # Update risk scores
-                obligations = update_obligation_risks(obligations)
+                # Update compliance status based on current date, parsing and
+                # comparing all concrete deadlines in one vectorized pass
+                deadlines = pd.Series([ob['next_deadline'] for ob in obligations], dtype=object)
+                has_date = ~deadlines.isin(SENTINEL_DEADLINES)
+                due_dates = pd.to_datetime(deadlines.where(has_date), errors='coerce', format='%Y-%m-%d')
+                days_left = (due_dates - pd.Timestamp(today)).dt.days
+                statuses = np.select([days_left < 0, days_left <= 7], ['Missed', 'Due Soon'], default='Compliant')
+                for obligation, dated, status in zip(obligations, has_date, statuses.tolist()):
+                    if dated:
+                        obligation['compliance_status'] = status
                 
-                # Update compliance status based on current date
-                for obligation in obligations:
-                    if obligation['next_deadline'] and obligation['next_deadline'] != "Upon Event" and "End of" not in obligation['next_deadline']:
-                        try:
-                            obligation['compliance_status'] = get_compliance_status(obligation['next_deadline'])
-                        except:
-                            obligation['compliance_status'] = "Compliant"
+                # Update risk scores, now that deadline status is known
+                obligations = update_obligation_risks(obligations)
                 
                 st.session_state.obligations = obligations
                 st.session_state.processed_text = text_input
                 
                 st.success(f"Successfully extracted {len(obligations)} obligations!")
                 
-                # Save obligations to JSON
-                with open("data/extracted_obligations.json", "w") as f:
-                    json.dump(obligations, f, indent=2, default=str)
+                # Save obligations to JSON in the background
+                threading.Thread(target=_persist_obligations, args=(obligations, _persist_lock()),
+                                 daemon=True).start()
                 
             except Exception as e:
                 st.error(f"Error extracting obligations: {str(e)}")
@@ -172,10 +302,10 @@ if st.session_state.obligations:
         
         # Metrics cards
         total_obligations = len(obligations)
-        compliant_count = len([ob for ob in obligations if ob['compliance_status'] == 'Compliant'])
-        due_soon_count = len([ob for ob in obligations if ob['compliance_status'] == 'Due Soon'])
-        missed_count = len([ob for ob in obligations if ob['compliance_status'] == 'Missed'])
-        high_risk_count = len(get_high_risk_obligations(obligations))
+        status_counts, risk_category_counts = _dashboard_counts(obligations)
+        compliant_count = status_counts['Compliant']
+        due_soon_count = status_counts['Due Soon']
+        missed_count = status_counts['Missed']
         
         # Display metrics in columns
         metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
@@ -195,101 +325,57 @@ if st.session_state.obligations:
         # Risk distribution
         st.subheader("🚨 Risk Distribution")
         risk_counts = {
-            "High": len([ob for ob in obligations if ob['risk_category'] == 'High']),
-            "Medium": len([ob for ob in obligations if ob['risk_category'] == 'Medium']),
-            "Low": len([ob for ob in obligations if ob['risk_category'] == 'Low'])
+            "High": risk_category_counts['High'],
+            "Medium": risk_category_counts['Medium'],
+            "Low": risk_category_counts['Low']
         }
         
-
-        
         # Create a pie chart for risk distribution
-        fig, ax = plt.subplots(figsize=(6, 4))
-        ax.pie(risk_counts.values(), labels=risk_counts.keys(), autopct='%1.1f%%', startangle=90, 
-               colors=['#ef4444', '#f59e0b', '#10b981'])
-        ax.set_title('Risk Level Distribution')
-        st.pyplot(fig)
-        plt.close()
+        st.altair_chart(_build_risk_chart(risk_counts), use_container_width=True)
     
     # Display obligations table
     st.subheader("📋 All Obligations")
     
-    if st.session_state.obligations:
-        # Convert obligations to DataFrame for display
-        df_data = []
-        for ob in st.session_state.obligations:
-            df_data.append({
-                'ID': ob['id'],
-                'Type': ob['type'],
-                'Description': ob['description'][:100] + "..." if len(ob['description']) > 100 else ob['description'],
-                'Frequency': ob['frequency'],
-                'Deadline Rule': ob['deadline_rule'],
-                'Next Deadline': ob['next_deadline'],
-                'Risk Level': ob['risk_category'],
-                'Status': ob['compliance_status']
-            })
-        
-        df = pd.DataFrame(df_data)
-        
-        # Color-code the status column
-        def color_status(val):
-            if val == 'Compliant':
-                return 'background-color: #d1fae5; color: #065f46'
-            elif val == 'Due Soon':
-                return 'background-color: #fef3c7; color: #92400e'
-            elif val == 'Missed':
-                return 'background-color: #fee2e2; color: #991b1b'
-            else:
-                return ''
-        
-        def color_risk(val):
-            if val == 'High':
-                return 'background-color: #fee2e2; color: #991b1b; font-weight: bold'
-            elif val == 'Medium':
-                return 'background-color: #fef3c7; color: #92400e'
-            else:
-                return 'background-color: #d1fae5; color: #065f46'
-        
-        styled_df = df.style.applymap(color_status, subset=['Status']).applymap(color_risk, subset=['Risk Level'])
-        
-        st.dataframe(styled_df, use_container_width=True, height=400)
+    # Convert obligations to DataFrame for display
+    df = _build_display_df(st.session_state.obligations)
+    
+    # Color-code the status and risk columns
+    styled_df = (df.style
+                 .apply(lambda col: col.map(STATUS_STYLES).fillna(''), subset=['Status'])
+                 .apply(lambda col: col.map(RISK_STYLES).fillna(RISK_STYLES['Low']), subset=['Risk Level']))
+    
+    st.dataframe(styled_df, use_container_width=True, height=400)
+    
+    # Pick the high-risk and due-soon obligations with boolean masks over the
+    # table columns; rows line up with st.session_state.obligations
+    high_risk_rows = np.flatnonzero((df['Risk Level'] == 'High').to_numpy())
+    upcoming_rows = np.flatnonzero((df['Status'] == 'Due Soon').to_numpy())
     
     # High-risk obligations section
-    high_risk_obligations = get_high_risk_obligations(st.session_state.obligations)
+    high_risk_obligations = [st.session_state.obligations[i] for i in high_risk_rows]
     if high_risk_obligations:
         st.subheader("⚠️ High-Risk Obligations")
-        for ob in high_risk_obligations:
-            status_class = "high-risk"
-            if ob['compliance_status'] == 'Due Soon':
-                status_class += " due-soon"
-            elif ob['compliance_status'] == 'Missed':
-                status_class += " missed"
-            
-            with st.container():
-                html_content = f"""<div class='{status_class} card'>
-                    <strong>Type:</strong> {ob['type']}<br>
-                    <strong>Description:</strong> {ob['description']}<br>
-                    <strong>Frequency:</strong> {ob['frequency']}<br>
-                    <strong>Deadline:</strong> {ob['deadline_rule']} (Next: {ob['next_deadline']})<br>
-                    <strong>Status:</strong> <span style='font-weight:bold;'>{ob['compliance_status']}</span>
-                </div>"""
-                st.markdown(html_content, unsafe_allow_html=True)
+        html_content = "".join(f"""<div class='{_high_risk_card_class(ob)} card'>
+                <strong>Type:</strong> {ob['type']}<br>
+                <strong>Description:</strong> {ob['description']}<br>
+                <strong>Frequency:</strong> {ob['frequency']}<br>
+                <strong>Deadline:</strong> {ob['deadline_rule']} (Next: {ob['next_deadline']})<br>
+                <strong>Status:</strong> <span style='font-weight:bold;'>{ob['compliance_status']}</span>
+            </div>""" for ob in high_risk_obligations)
+        st.markdown(html_content, unsafe_allow_html=True)
     
     # Upcoming deadlines section
-    upcoming = get_upcoming_deadlines(st.session_state.obligations)
+    upcoming = [st.session_state.obligations[i] for i in upcoming_rows]
     if upcoming:
         st.subheader("📅 Upcoming Deadlines")
-        for ob in upcoming:
-            status_class = "due-soon"
-            
-            with st.container():
-                html_content = f"""<div class='{status_class} card'>
-                    <strong>Type:</strong> {ob['type']}<br>
-                    <strong>Description:</strong> {ob['description']}<br>
-                    <strong>Deadline:</strong> {ob['deadline_rule']}<br>
-                    <strong>Next Deadline:</strong> {ob['next_deadline']}<br>
-                    <strong>Status:</strong> <span style='font-weight:bold;'>{ob['compliance_status']}</span>
-                </div>"""
-                st.markdown(html_content, unsafe_allow_html=True)
+        html_content = "".join(f"""<div class='due-soon card'>
+                <strong>Type:</strong> {ob['type']}<br>
+                <strong>Description:</strong> {ob['description']}<br>
+                <strong>Deadline:</strong> {ob['deadline_rule']}<br>
+                <strong>Next Deadline:</strong> {ob['next_deadline']}<br>
+                <strong>Status:</strong> <span style='font-weight:bold;'>{ob['compliance_status']}</span>
+            </div>""" for ob in upcoming)
+        st.markdown(html_content, unsafe_allow_html=True)
 
 else:
     # If no obligations, show welcome message
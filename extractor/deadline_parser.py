@@ -1,14 +1,92 @@
+import calendar
 import re
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, Optional
 
 
-def parse_deadline(text: str) -> Dict[str, Optional[str]]:
+# All deadline forms fused into a single alternation with one named group per
+# form. Every alternative sits inside a lookahead so that overlapping forms
+# (e.g. "end of quarter" inside the reference of a "within 45 days after ..."
+# clause) are still reported by a single finditer pass over the text.
+_DEADLINE_RE = re.compile(r"""
+    (?=
+        (?P<within>(?:within|after|by|no\ later\ than)\s+(?P<within_qty>\d+)\s+(?P<within_unit>days?|months?|weeks?|years?)
+            \s+(?:after|of|following)\s+(?P<within_ref>.*))
+      | (?P<before>(?P<before_qty>\d+)\s+(?P<before_unit>days?|months?|weeks?|years?)
+            \s+(?:before|prior\ to)\s+(?P<before_ref>.*))
+      | (?P<immediate>promptly|immediately|as\ soon\ as\ possible|without\ delay)
+      | (?P<endof>end\ of\s+(?P<period>month|quarter|year|fiscal\ year|calendar\ year))
+      | (?P<frequency>monthly|quarterly|annually|yearly|semi-annually|bi-annually|event-based)
+      | (?P<window>within\s+\d+\s+days?)
+      | (?P<by_date>by\s+\w+\s+\d{1,2}(?:st|nd|rd|th)?,\s*\d{4})  # Like "by March 15, 2024"
+    )
+""", re.IGNORECASE | re.VERBOSE)
+
+# Cheap pre-filter: every deadline form above needs at least one of these
+# fragments, so text without any of them cannot produce a rule
+_KEYWORD_RE = re.compile(
+    r'day|week|month|quarter|year|annual|prompt|immediate|as soon as possible|without delay|event-based|by\s',
+    re.IGNORECASE
+)
+
+# Length of each deadline unit in days (months and years are estimated,
+# not exact, due to varying month lengths)
+_UNIT_DAYS = {
+    "day": 1, "days": 1,
+    "week": 7, "weeks": 7,
+    "month": 30, "months": 30,
+    "year": 365, "years": 365,
+}
+
+# Last (month, day) of each calendar quarter
+_QUARTER_END = {1: (3, 31), 2: (6, 30), 3: (9, 30), 4: (12, 31)}
+
+# Placeholder dates for end-of-period deadlines, checked in order
+_PERIOD_END_DATES = (
+    ("month", "End of Month"),
+    ("quarter", "End of Quarter"),
+    ("year", "End of Year"),
+)
+
+# Deadline values that stand for no concrete date
+SENTINEL_DEADLINES = frozenset({"", None, "Upon Event"} | {label for _, label in _PERIOD_END_DATES})
+
+
+def parse_deadline(text: str, today: Optional[date] = None) -> Dict[str, Optional[str]]:
     """
     Parses deadline information from text and calculates expected dates.
     
     Args:
         text (str): Text containing deadline information
+        today (Optional[date]): Date to calculate from; defaults to now
+        
+    Returns:
+        Dict: Contains rule, calculated_date, and other relevant information
+    """
+    # Skip the full scan for text with no deadline vocabulary at all
+    if not _KEYWORD_RE.search(text):
+        return _build_result({}, today)
+    
+    # Scan the text once, keeping the first match of each deadline form
+    found = {}
+    for match in _DEADLINE_RE.finditer(text):
+        found.setdefault(match.lastgroup, match)
+        # The first end-of-period deadline, when it resolves to a date, overrides
+        # every other form, so the rest of the text cannot change the result
+        if (match.lastgroup == "endof" and found["endof"] is match
+                and _period_end_date(match.group("period"))):
+            break
+    
+    return _build_result(found, today)
+
+
+def _build_result(found: Dict[str, re.Match], today: Optional[date]) -> Dict[str, Optional[str]]:
+    """
+    Builds the parse_deadline result from the deadline forms found in a text.
+    
+    Args:
+        found (Dict[str, re.Match]): First match of each deadline form, keyed by form
+        today (Optional[date]): Date to calculate from; defaults to now
         
     Returns:
         Dict: Contains rule, calculated_date, and other relevant information
@@ -20,81 +98,43 @@ def parse_deadline(text: str) -> Dict[str, Optional[str]]:
         "description": ""
     }
     
-    # Look for deadline patterns
-    deadline_patterns = [
-        # Pattern for "X days/months after"
-        r'(?i)(?:within|after|by|no later than)\s+(\d+)\s+(days?|months?|weeks?|years?)\s+(?:after|of|following)\s+(.*)',
-        # Pattern for "X days/months of"
-        r'(?i)(\d+)\s+(days?|months?|weeks?|years?)\s+(?:before|prior to)\s+(.*)',
-        # Pattern for specific timeframes
-        r'(?i)(?:monthly|quarterly|annually|yearly|semi-annually|bi-annually)',
-        # Pattern for specific events
-        r'(?i)(?:promptly|immediately|as soon as possible|without delay)',
-        # Pattern for end of periods
-        r'(?i)(?:end of|by end of)\s+(?:month|quarter|year|fiscal year|calendar year)',
-    ]
-    
-    # Extract deadline rule
-    for pattern in deadline_patterns[:3]:  # First three patterns that have date calculations
-        match = re.search(pattern, text)
+    # Extract deadline rule ("before" clauses take precedence over "within")
+    for kind in ("within", "before"):
+        match = found.get(kind)
         if match:
-            if len(match.groups()) >= 3:
-                # Format: "within 30 days after month end"
-                quantity = match.group(1)
-                unit = match.group(2)
-                reference = match.group(3)
-                result["rule"] = f"within {quantity} {unit} after {reference}"
-                
-                # Calculate the expected date
-                calculated_date = calculate_expected_date(quantity, unit, reference)
-                if calculated_date:
-                    result["calculated_date"] = calculated_date.strftime("%Y-%m-%d")
+            # Format: "within 30 days after month end"
+            quantity = match.group(f"{kind}_qty")
+            unit = match.group(f"{kind}_unit")
+            reference = match.group(f"{kind}_ref")
+            result["rule"] = f"within {quantity} {unit} after {reference}"
             
-            elif len(match.groups()) >= 1:
-                # For simple frequency patterns
-                result["rule"] = match.group(0)
-                result["frequency"] = match.group(0)
+            # Calculate the expected date
+            calculated_date = calculate_expected_date(quantity, unit, reference, today)
+            if calculated_date:
+                result["calculated_date"] = calculated_date.strftime("%Y-%m-%d")
     
     # Handle immediate/prompt notifications
-    immediate_patterns = [r'(?i)(?:promptly|immediately|as soon as possible|without delay)']
-    for pattern in immediate_patterns:
-        if re.search(pattern, text):
-            result["rule"] = "immediate upon occurrence"
-            result["calculated_date"] = "Upon Event"
-            break
+    if "immediate" in found:
+        result["rule"] = "immediate upon occurrence"
+        result["calculated_date"] = "Upon Event"
     
     # Handle end-of-period deadlines
-    period_end_patterns = [
-        r'(?i)(?:end of\s+)(month|quarter|year|fiscal year|calendar year)',
-        r'(?i)(?:by end of\s+)(month|quarter|year|fiscal year|calendar year)'
-    ]
-    for pattern in period_end_patterns:
-        match = re.search(pattern, text)
-        if match:
-            period = match.group(1)
-            result["rule"] = f"by end of {period}"
-            
-            # Calculate approximate date based on period
-            if "month" in period:
-                result["calculated_date"] = "End of Month"
-            elif "quarter" in period:
-                result["calculated_date"] = "End of Quarter"
-            elif "year" in period:
-                result["calculated_date"] = "End of Year"
-            break
+    match = found.get("endof")
+    if match:
+        period = match.group("period")
+        result["rule"] = f"by end of {period}"
+        
+        # Calculate approximate date based on period
+        period_end_date = _period_end_date(period)
+        if period_end_date:
+            result["calculated_date"] = period_end_date
     
     # If no specific rule was found, look for general timeframe words
     if not result["rule"]:
-        general_patterns = [
-            r'(?i)(?:monthly|quarterly|annually|yearly|semi-annually|bi-annually|event-based)',
-            r'(?i)(?:within\s+\d+\s+days?)',
-            r'(?i)(?:by\s+\w+\s+\d{1,2}(?:st|nd|rd|th)?,\s*\d{4})'  # Like "by March 15, 2024"
-        ]
-        
-        for pattern in general_patterns:
-            match = re.search(pattern, text)
+        for kind in ("frequency", "window", "by_date"):
+            match = found.get(kind)
             if match:
-                result["rule"] = match.group(0)
+                result["rule"] = match.group(kind)
                 break
     
     # Set description if not already set
@@ -104,7 +144,24 @@ def parse_deadline(text: str) -> Dict[str, Optional[str]]:
     return result
 
 
-def calculate_expected_date(quantity: str, unit: str, reference: str) -> Optional[datetime]:
+def _period_end_date(period: str) -> str:
+    """
+    Maps an end-of-period phrase to its placeholder date.
+    
+    Args:
+        period (str): Period name (e.g., "month", "fiscal year")
+        
+    Returns:
+        str: Placeholder date (e.g., "End of Month"), or "" if unrecognized
+    """
+    for key, label in _PERIOD_END_DATES:
+        if key in period:
+            return label
+    return ""
+
+
+def calculate_expected_date(quantity: str, unit: str, reference: str,
+                            today: Optional[date] = None) -> Optional[datetime]:
     """
     Calculates an expected date based on quantity, unit, and reference point.
     
@@ -112,31 +169,23 @@ def calculate_expected_date(quantity: str, unit: str, reference: str) -> Optiona
         quantity (str): Number of units (e.g., "30")
         unit (str): Unit of time (e.g., "days", "months")
         reference (str): Reference point (e.g., "end of month", "quarter end")
+        today (Optional[date]): Date to calculate from; defaults to now
         
     Returns:
         Optional[datetime]: Calculated date or None if calculation isn't possible
     """
     try:
         qty = int(quantity)
-        today = datetime.today()
+        today = today or datetime.today()
         
-        # Handle different units
-        if "day" in unit:
-            return today + timedelta(days=qty)
-        elif "week" in unit:
-            return today + timedelta(weeks=qty)
-        elif "month" in unit:
-            # For months, we'll estimate (not exact due to varying month lengths)
-            estimated_days = qty * 30
-            return today + timedelta(days=estimated_days)
-        elif "year" in unit:
-            estimated_days = qty * 365
-            return today + timedelta(days=estimated_days)
+        # Handle different units with plain day arithmetic
+        unit_days = _UNIT_DAYS.get(unit.lower())
+        if unit_days:
+            return today + timedelta(days=qty * unit_days)
         
         # Handle reference points like "end of month", "end of quarter", etc.
         if "end of month" in reference.lower() or "month end" in reference.lower():
             # Calculate the last day of the current month
-            import calendar
             last_day = calendar.monthrange(today.year, today.month)[1]
             month_end = today.replace(day=last_day)
             return month_end + timedelta(days=qty)
@@ -144,11 +193,8 @@ def calculate_expected_date(quantity: str, unit: str, reference: str) -> Optiona
         elif "end of quarter" in reference.lower() or "quarter end" in reference.lower():
             # Calculate the end of the current quarter
             current_quarter = ((today.month - 1) // 3) + 1
-            quarter_end_month = current_quarter * 3
-            # Get the last day of that month
-            import calendar
-            last_day = calendar.monthrange(today.year, quarter_end_month)[1]
-            quarter_end = today.replace(month=quarter_end_month, day=last_day)
+            quarter_end_month, quarter_end_day = _QUARTER_END[current_quarter]
+            quarter_end = today.replace(month=quarter_end_month, day=quarter_end_day)
             return quarter_end + timedelta(days=qty)
         
         elif "end of year" in reference.lower() or "year end" in reference.lower():
@@ -164,23 +210,27 @@ def calculate_expected_date(quantity: str, unit: str, reference: str) -> Optiona
         return None
 
 
-def get_compliance_status(deadline_date: str) -> str:
+def get_compliance_status(deadline_date: str, today: Optional[date] = None) -> str:
     """
     Determines compliance status based on deadline date.
     
     Args:
         deadline_date (str): Expected deadline date in YYYY-MM-DD format
+        today (Optional[date]): Date to compare against; defaults to today
         
     Returns:
         str: Compliance status ("Compliant", "Due Soon", "Missed")
     """
-    if not deadline_date or deadline_date == "Upon Event" or "End of" in deadline_date:
+    if deadline_date in SENTINEL_DEADLINES:
         # For ongoing/flexible deadlines, default to compliant
         return "Compliant"
     
     try:
-        deadline = datetime.strptime(deadline_date, "%Y-%m-%d")
-        today = datetime.today()
+        deadline = date.fromisoformat(deadline_date)
+        if today is None:
+            today = date.today()
+        elif isinstance(today, datetime):
+            today = today.date()
         
         # Calculate difference in days
         diff_days = (deadline - today).days
@@ -1,7 +1,217 @@
+import hashlib
+import mmap
+import os
 import re
-from datetime import datetime
-from typing import List, Dict, Tuple
+from functools import lru_cache
+from datetime import date, datetime
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from .deadline_parser import parse_deadline
+from .pdf_reader import iter_pdf_text, read_file_content
+
+
+# Sentence boundaries: periods, question marks, exclamation marks, and common sentence endings
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+|;\s+|\n+')
+
+
+class _NonWordDeleter(dict):
+    """
+    str.translate table deleting non-word characters (those r'\\W' matches).
+    
+    Entries are filled in the first time a character is seen, so the table
+    covers all of Unicode while only holding characters that occur.
+    """
+    
+    def __missing__(self, codepoint: int):
+        char = chr(codepoint)
+        kept = codepoint if char.isalnum() or char == '_' else None
+        self[codepoint] = kept
+        return kept
+
+
+# Non-word characters, ignored when comparing descriptions
+_NON_WORD_DELETER = _NonWordDeleter()
+
+# Fields every new obligation starts with: the borrower is responsible, and
+# nothing has been missed yet
+_RESPONSIBLE_PARTY = "Borrower"
+_INITIAL_COMPLIANCE_STATUS = "Compliant"
+
+
+# Obligation ids keep 53 bits: non-negative, within SQLite's signed 64-bit
+# INTEGER, and exactly representable as a JavaScript number in JSON consumers
+_ID_MASK = (1 << 53) - 1
+
+
+def _stable_id(sentence: str) -> int:
+    """
+    Derives a 53-bit obligation id from the sentence text.
+    
+    Unlike hash(), the result is the same in every process.
+    """
+    digest = hashlib.blake2b(sentence.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') & _ID_MASK
+
+
+def _compile_any(*patterns: str) -> re.Pattern:
+    """
+    Fuses regex patterns into one alternation.
+    
+    The fused pattern matches a text exactly when any of the individual
+    patterns does, but scans it only once. Patterns are written in lower
+    case and matched against lowercased text, so no case folding is
+    needed while scanning.
+    
+    Args:
+        *patterns (str): Regex pattern strings
+        
+    Returns:
+        re.Pattern: Compiled alternation of all patterns
+    """
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+
+
+# Patterns for each obligation type (one fused regex per type, matched against lowercased text)
+_FINANCIAL_COVENANT_RE = _compile_any(
+    r'(?:maintain|require|covenant|agreement).*?(?:debt service coverage|interest coverage|leverage ratio|current ratio|quick ratio|working capital|debt to equity|total debt)',
+    r'(?:financial covenant|financial ratio|ratio covenant).*?',
+    r'(?:minimum|maximum).*?(?:balance sheet|equity|assets|liabilities|revenue|net worth|cash flow)'
+)
+
+_REPORTING_RE = _compile_any(
+    r'(?:provide|submit|deliver|furnish|send).*?(?:report|statement|financial|quarterly|monthly|annual|yearly|audit)',
+    r'(?:monthly|quarterly|annual).*?(?:report|statement|financial)',
+    r'(?:financial statements?|income statement|balance sheet|cash flow statement|tax returns?)'
+)
+
+_NOTIFICATION_RE = _compile_any(
+    r'(?:notify|inform|advise|tell|report).*?(?:change|event|default|breach|material|condition)',
+    r'(?:promptly notify|immediately inform|without delay).*?(?:lender|agent|bank)',
+    r'(?:notice of|notification of|inform of).*?(?:default|event|change|condition)'
+)
+
+# Literals every pattern of a type begins with (lowercase). A sentence
+# containing none of them cannot match that type, so its regex is skipped
+_FINANCIAL_COVENANT_ANCHORS = (
+    'maintain', 'require', 'covenant', 'agreement', 'financial ratio',
+    'minimum', 'maximum'
+)
+
+_REPORTING_ANCHORS = (
+    'provide', 'submit', 'deliver', 'furnish', 'send', 'monthly',
+    'quarterly', 'annual', 'statement', 'balance sheet', 'tax return'
+)
+
+_NOTIFICATION_ANCHORS = (
+    'notify', 'inform', 'advise', 'tell', 'report', 'without delay',
+    'notice of', 'notification of'
+)
+
+# Any anchor of any type, as bytes, to probe raw documents before decoding them
+_ANCHOR_BYTES_RE = re.compile(
+    b'|'.join(re.escape(anchor.encode('utf-8')) for anchor in chain(
+        _FINANCIAL_COVENANT_ANCHORS, _REPORTING_ANCHORS, _NOTIFICATION_ANCHORS
+    )),
+    re.IGNORECASE
+)
+
+# Frequency indicators, checked in order
+_FREQUENCY_INDICATORS = {
+    'Monthly': _compile_any(r'\bmonth\b', r'\bmonthly\b', r'eom\b', r'end of month'),
+    'Quarterly': _compile_any(r'\bquarter\b', r'\bquarterly\b', r'q\d', r'end of quarter'),
+    'Annual': _compile_any(r'\byear\b', r'\bannual\b', r'\byearly\b', r'end of year'),
+    'Event-based': _compile_any(r'upon', r'when', r'if', r'as soon as', r'within.*?(?:days|hours|weeks)')
+}
+
+# Risk indicators (plain lowercase keywords, matched as substrings)
+_HIGH_RISK_KEYWORDS = (
+    'default', 'acceleration', 'foreclosure', 'penalty',
+    'interest rate increase', 'event of default', 'material adverse',
+    'cross-default', 'cross-acceleration', 'forfeit', 'terminate'
+)
+
+_MEDIUM_RISK_KEYWORDS = (
+    'fee', 'charge', 'cost', 'expense', 'compliance',
+    'remedy', 'cure period', 'waiver', 'consent'
+)
+
+
+# The classifiers below are pure functions of the lowercased sentence, so
+# boilerplate repeated across sentences and documents is classified once
+
+@lru_cache(maxsize=4096)
+def _classify_obligation_type(sentence_lower: str) -> str:
+    """
+    Classifies the type of obligation based on patterns.
+    
+    Args:
+        sentence_lower (str): Lowercased sentence to analyze
+        
+    Returns:
+        str: Obligation type (Financial Covenant, Reporting, or Notification)
+    """
+    # Each type's regex only runs when one of its anchor literals is present
+    # Check for financial covenants
+    if (any(anchor in sentence_lower for anchor in _FINANCIAL_COVENANT_ANCHORS)
+            and _FINANCIAL_COVENANT_RE.search(sentence_lower)):
+        return "Financial Covenant"
+    
+    # Check for reporting obligations
+    if (any(anchor in sentence_lower for anchor in _REPORTING_ANCHORS)
+            and _REPORTING_RE.search(sentence_lower)):
+        return "Reporting"
+    
+    # Check for notification obligations
+    if (any(anchor in sentence_lower for anchor in _NOTIFICATION_ANCHORS)
+            and _NOTIFICATION_RE.search(sentence_lower)):
+        return "Notification"
+    
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _determine_frequency(sentence_lower: str) -> str:
+    """
+    Determines the frequency of the obligation.
+    
+    Args:
+        sentence_lower (str): Lowercased sentence containing the obligation
+        
+    Returns:
+        str: Frequency (Monthly, Quarterly, Annual, or Event-based)
+    """
+    # Check for each frequency type
+    for freq, pattern in _FREQUENCY_INDICATORS.items():
+        if pattern.search(sentence_lower):
+            return freq
+    
+    # Default to event-based if no specific frequency is found
+    return "Event-based"
+
+
+@lru_cache(maxsize=4096)
+def _calculate_risk_level(sentence_lower: str) -> str:
+    """
+    Calculates the risk level based on keywords in the sentence.
+    
+    Args:
+        sentence_lower (str): Lowercased sentence to analyze
+        
+    Returns:
+        str: Risk level (High, Medium, or Low)
+    """
+    # The keywords are literals, so a substring scan of the lowercased
+    # sentence finds them without running the regex engine
+    
+    # Any high risk keyword makes the obligation high risk
+    if any(keyword in sentence_lower for keyword in _HIGH_RISK_KEYWORDS):
+        return "High"
+    
+    # Otherwise any medium risk keyword makes it medium risk
+    if any(keyword in sentence_lower for keyword in _MEDIUM_RISK_KEYWORDS):
+        return "Medium"
+    
+    return "Low"
 
 
 class ObligationExtractor:
@@ -17,251 +227,196 @@ class ObligationExtractor:
     - Risk level (Low / Medium / High)
     """
     
-    def __init__(self):
-        # Define patterns for different obligation types
-        self.financial_covenant_patterns = [
-            r'(?i)(?:maintain|require|covenant|agreement).*?(?:debt service coverage|interest coverage|leverage ratio|current ratio|quick ratio|working capital|debt to equity|total debt)',
-            r'(?i)(?:financial covenant|financial ratio|ratio covenant).*?',
-            r'(?i)(?:minimum|maximum).*?(?:balance sheet|equity|assets|liabilities|revenue|net worth|cash flow)'
-        ]
-        
-        self.reporting_patterns = [
-            r'(?i)(?:provide|submit|deliver|furnish|send).*?(?:report|statement|financial|quarterly|monthly|annual|yearly|audit)',
-            r'(?i)(?:monthly|quarterly|annual).*?(?:report|statement|financial)',
-            r'(?i)(?:financial statements?|income statement|balance sheet|cash flow statement|tax returns?)'
-        ]
-        
-        self.notification_patterns = [
-            r'(?i)(?:notify|inform|advise|tell|report).*?(?:change|event|default|breach|material|condition)',
-            r'(?i)(?:promptly notify|immediately inform|without delay).*?(?:lender|agent|bank)',
-            r'(?i)(?:notice of|notification of|inform of).*?(?:default|event|change|condition)'
-        ]
-        
-        # Define frequency indicators
-        self.frequency_indicators = {
-            'Monthly': [r'(?i)\bmonth\b', r'(?i)\bmonthly\b', r'(?i)eom\b', r'(?i)end of month'],
-            'Quarterly': [r'(?i)\bquarter\b', r'(?i)\bquarterly\b', r'(?i)q\d', r'(?i)end of quarter'],
-            'Annual': [r'(?i)\byear\b', r'(?i)\bannual\b', r'(?i)\byearly\b', r'(?i)end of year'],
-            'Event-based': [r'(?i)upon', r'(?i)when', r'(?i)if', r'(?i)as soon as', r'(?i)within.*?(?:days|hours|weeks)']
-        }
-        
-        # Define risk indicators
-        self.high_risk_keywords = [
-            r'(?i)default', r'(?i)acceleration', r'(?i)foreclosure', r'(?i)penalty', 
-            r'(?i)interest rate increase', r'(?i)event of default', r'(?i)material adverse',
-            r'(?i)cross-default', r'(?i)cross-acceleration', r'(?i)forfeit', r'(?i)terminate'
-        ]
-        
-        self.medium_risk_keywords = [
-            r'(?i)fee', r'(?i)charge', r'(?i)cost', r'(?i)expense', r'(?i)compliance',
-            r'(?i)remedy', r'(?i)cure period', r'(?i)waiver', r'(?i)consent'
-        ]
-
-    def extract_obligations(self, text: str) -> List[Dict]:
+    def extract_obligations(self, text: Union[str, Iterable[str]],
+                            today: Optional[date] = None) -> List[Dict]:
         """
         Extracts obligations from loan agreement text.
         
         Args:
-            text (str): Loan agreement text
+            text (Union[str, Iterable[str]]): Loan agreement text, either whole
+                or as consecutive chunks (e.g. pages). Each chunk boundary is
+                treated as a sentence boundary.
+            today (Optional[date]): Date to calculate deadlines from; defaults to now
             
         Returns:
             List[Dict]: List of extracted obligations with structured data
         """
         obligations = []
+        seen_descriptions = set()
         
-        # Split text into sentences/paragraphs for processing
-        sentences = self._split_into_sentences(text)
-        
-        for sentence in sentences:
-            obligation = self._extract_single_obligation(sentence.strip())
-            if obligation:
-                obligations.append(obligation)
-        
-        # Deduplicate similar obligations
-        obligations = self._deduplicate_obligations(obligations)
+        # Resolve "today" once so every deadline in the batch shares it
+        today = today or datetime.today()
+        
+        chunks = (text,) if isinstance(text, str) else text
+        for chunk in chunks:
+            # Split the chunk into sentences/paragraphs
+            for start, end in self._sentence_spans(chunk):
+                sentence = chunk[start:end]
+                sentence_lower = sentence.lower()
+                
+                # Skip sentences repeating an obligation already extracted, using a
+                # normalized version of the description for comparison
+                norm_desc = sentence_lower.translate(_NON_WORD_DELETER)
+                if norm_desc in seen_descriptions:
+                    continue
+                
+                obligation = self._extract_single_obligation(sentence, sentence_lower, today)
+                if obligation:
+                    seen_descriptions.add(norm_desc)
+                    obligations.append(obligation)
         
         return obligations
 
-    def _split_into_sentences(self, text: str) -> List[str]:
+    def _sentence_spans(self, text: str) -> Iterator[Tuple[int, int]]:
         """
         Splits text into sentences for processing.
+        
+        Yields:
+            Tuple[int, int]: (start, end) offsets of each sentence in text,
+            excluding surrounding whitespace
         """
-        # Split on periods, question marks, exclamation marks, and common sentence endings
-        sentences = re.split(r'[.!?]+|;\s+|\n+', text)
-        # Filter out empty sentences and very short ones
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
-        return sentences
+        # Each sentence runs up to the next delimiter, the last one to the end of text
+        delimiters = chain((m.span() for m in _SENTENCE_SPLIT_RE.finditer(text)), [(len(text), len(text))])
+        
+        start = 0
+        for delimiter_start, delimiter_end in delimiters:
+            # Filter out empty sentences and very short ones; a piece that is
+            # short before stripping is never sliced at all
+            if delimiter_start - start > 20:
+                piece = text[start:delimiter_start]
+                sentence = piece.strip()
+                if len(sentence) > 20:
+                    sentence_start = start + len(piece) - len(piece.lstrip())
+                    yield sentence_start, sentence_start + len(sentence)
+            start = delimiter_end
 
-    def _extract_single_obligation(self, sentence: str) -> Dict:
+    def _extract_single_obligation(self, sentence: str, sentence_lower: str, today: date) -> Dict:
         """
         Extracts a single obligation from a sentence.
         
         Args:
             sentence (str): Sentence to analyze
+            sentence_lower (str): The sentence lowercased, for pattern matching
+            today (date): Date to calculate the deadline from
             
         Returns:
             Dict: Obligation data if found, None otherwise
         """
         # Determine obligation type
-        obligation_type = self._classify_obligation_type(sentence)
+        obligation_type = _classify_obligation_type(sentence_lower)
         if not obligation_type:
             return None
         
         # Extract obligation description
-        description = self._extract_description(sentence, obligation_type)
+        description = self._extract_description(sentence)
         
         # Determine frequency
-        frequency = self._determine_frequency(sentence)
-        
-        # Extract deadline information
-        deadline_info = parse_deadline(sentence)
+        frequency = _determine_frequency(sentence_lower)
         
         # Determine risk level
-        risk_level = self._calculate_risk_level(sentence)
+        risk_level = _calculate_risk_level(sentence_lower)
         
-        # Set responsible party
-        responsible_party = "Borrower"
-        
-        # Determine compliance status (initially "Compliant" for new entries)
-        compliance_status = "Compliant"
+        # Extract deadline information; only obligations pay for deadline
+        # parsing. parse_deadline always sets both deadline fields
+        deadline_info = parse_deadline(sentence, today)
         
         return {
-            "id": hash(sentence) % 1000000,  # Simple ID generation
+            "id": _stable_id(sentence),
             "type": obligation_type,
             "description": description,
             "frequency": frequency,
-            "deadline_rule": deadline_info.get("rule", ""),
-            "responsible_party": responsible_party,
+            "deadline_rule": deadline_info["rule"],
+            "responsible_party": _RESPONSIBLE_PARTY,
             "risk_level": risk_level,
-            "compliance_status": compliance_status,
-            "next_deadline": deadline_info.get("calculated_date", "")
+            "compliance_status": _INITIAL_COMPLIANCE_STATUS,
+            "next_deadline": deadline_info["calculated_date"]
         }
 
-    def _classify_obligation_type(self, sentence: str) -> str:
-        """
-        Classifies the type of obligation based on patterns.
-        
-        Args:
-            sentence (str): Sentence to analyze
-            
-        Returns:
-            str: Obligation type (Financial Covenant, Reporting, or Notification)
-        """
-        # Check for financial covenants
-        for pattern in self.financial_covenant_patterns:
-            if re.search(pattern, sentence):
-                return "Financial Covenant"
-        
-        # Check for reporting obligations
-        for pattern in self.reporting_patterns:
-            if re.search(pattern, sentence):
-                return "Reporting"
-        
-        # Check for notification obligations
-        for pattern in self.notification_patterns:
-            if re.search(pattern, sentence):
-                return "Notification"
-        
-        return None
-
-    def _extract_description(self, sentence: str, obligation_type: str) -> str:
+    def _extract_description(self, sentence: str) -> str:
         """
         Extracts the description of the obligation.
         
+        The full sentence is kept as written (only surrounding whitespace is
+        removed), so the description reads exactly as in the agreement.
+        
         Args:
             sentence (str): Sentence containing the obligation
-            obligation_type (str): Type of obligation
             
         Returns:
             str: Description of the obligation
         """
-        # Clean up the sentence to extract the core obligation
-        # Remove common legal phrases and keep the core meaning
-        clean_sentence = re.sub(r'(?i)\b(?:the|a|an|and|or|but|in|on|at|to|for|of|with|by)\b', '', sentence)
-        
-        # Remove some legal boilerplate
-        clean_sentence = re.sub(r'(?i)\b(?:borrower shall|borrower will|it is agreed that|pursuant to|under this agreement)\b', '', clean_sentence)
-        
-        # Return a cleaned-up version of the sentence focusing on the obligation
         return sentence.strip()
 
-    def _determine_frequency(self, sentence: str) -> str:
-        """
-        Determines the frequency of the obligation.
-        
-        Args:
-            sentence (str): Sentence containing the obligation
-            
-        Returns:
-            str: Frequency (Monthly, Quarterly, Annual, or Event-based)
-        """
-        # Check for each frequency type
-        for freq, patterns in self.frequency_indicators.items():
-            for pattern in patterns:
-                if re.search(pattern, sentence):
-                    return freq
-        
-        # Default to event-based if no specific frequency is found
-        return "Event-based"
 
-    def _calculate_risk_level(self, sentence: str) -> str:
-        """
-        Calculates the risk level based on keywords in the sentence.
-        
-        Args:
-            sentence (str): Sentence to analyze
-            
-        Returns:
-            str: Risk level (High, Medium, or Low)
-        """
-        # Count high risk keywords
-        high_risk_count = sum(1 for pattern in self.high_risk_keywords if re.search(pattern, sentence))
-        
-        # Count medium risk keywords
-        medium_risk_count = sum(1 for pattern in self.medium_risk_keywords if re.search(pattern, sentence))
-        
-        if high_risk_count > 0:
-            return "High"
-        elif medium_risk_count > 0:
-            return "Medium"
-        else:
-            return "Low"
-
-    def _deduplicate_obligations(self, obligations: List[Dict]) -> List[Dict]:
-        """
-        Removes duplicate obligations based on similarity.
-        
-        Args:
-            obligations (List[Dict]): List of obligations to deduplicate
-            
-        Returns:
-            List[Dict]: Deduplicated list of obligations
-        """
-        seen_descriptions = set()
-        unique_obligations = []
-        
-        for obligation in obligations:
-            # Use a normalized version of the description for comparison
-            norm_desc = re.sub(r'\W+', '', obligation['description'].lower())
-            if norm_desc not in seen_descriptions:
-                seen_descriptions.add(norm_desc)
-                unique_obligations.append(obligation)
-        
-        return unique_obligations
+@lru_cache(maxsize=1)
+def _get_extractor() -> ObligationExtractor:
+    """
+    Returns a shared extractor for the module-level convenience functions.
+    The extractor keeps no state between calls, so sharing it is safe.
+    """
+    return ObligationExtractor()
 
 
-def extract_obligations_from_text(text: str) -> List[Dict]:
+def extract_obligations_from_text(text: str, today: Optional[date] = None) -> List[Dict]:
     """
     Convenience function to extract obligations from text.
     
     Args:
         text (str): Loan agreement text
+        today (Optional[date]): Date to calculate deadlines from; defaults to now
         
     Returns:
         List[Dict]: List of extracted obligations
     """
-    extractor = ObligationExtractor()
-    return extractor.extract_obligations(text)
+    return _get_extractor().extract_obligations(text, today)
+
+
+def extract_obligations_from_pdf(file_path: str, today: Optional[date] = None) -> List[Dict]:
+    """
+    Extracts obligations from a PDF file, page by page.
+    
+    The full document text is never built; each page is dropped once its
+    sentences have been processed.
+    
+    Args:
+        file_path (str): Path to the PDF file
+        today (Optional[date]): Date to calculate deadlines from; defaults to now
+        
+    Returns:
+        List[Dict]: List of extracted obligations
+    """
+    return _get_extractor().extract_obligations(iter_pdf_text(file_path), today)
+
+
+def extract_obligations_from_file(file_path: str, today: Optional[date] = None) -> List[Dict]:
+    """
+    Extracts obligations from a text or PDF file.
+    
+    Text files are memory-mapped and probed for the obligation anchor words
+    first; a document containing none of them cannot hold an obligation, so
+    it is never decoded or split into sentences. Such a file yields [] even
+    if it is not valid UTF-8, where read_file_content would raise
+    UnicodeDecodeError; files that pass the probe are decoded as before.
+    
+    Args:
+        file_path (str): Path to the file
+        today (Optional[date]): Date to calculate deadlines from; defaults to now
+        
+    Returns:
+        List[Dict]: List of extracted obligations
+    """
+    if file_path.lower().endswith('.pdf'):
+        return extract_obligations_from_pdf(file_path, today)
+    
+    with open(file_path, 'rb') as f:
+        # Empty files cannot be mapped (and hold nothing anyway)
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if not _ANCHOR_BYTES_RE.search(mm):
+                return []
+    
+    return _get_extractor().extract_obligations(read_file_content(file_path), today)
 
 
 if __name__ == "__main__":
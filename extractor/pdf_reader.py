@@ -1,10 +1,79 @@
+import io
+import threading
+from contextlib import ExitStack
 import pdfplumber
-from typing import Union, List
+import pypdfium2 as pdfium
+from typing import BinaryIO, Iterator, Union, List
+
+
+# PDFium is not thread-safe; concurrent app sessions must take turns calling it
+_PDFIUM_LOCK = threading.Lock()
+
+PdfSource = Union[str, bytes, BinaryIO]
+
+
+def _open_pdfium(source: PdfSource) -> pdfium.PdfDocument:
+    """
+    Opens a PDF with PDFium. The caller must hold _PDFIUM_LOCK.
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return pdfium.PdfDocument(source)
+
+
+def _close_pdfium(pdf: pdfium.PdfDocument) -> None:
+    """
+    Closes a PDFium document, taking _PDFIUM_LOCK.
+    """
+    with _PDFIUM_LOCK:
+        pdf.close()
+
+
+def _iter_page_texts(source: PdfSource) -> Iterator[str]:
+    """
+    Yields the text of each page of a PDF.
+    
+    Text comes from PDFium. Pages on which PDFium finds no text are
+    retried with pdfplumber's layout analysis, which is slower but
+    copes with some documents PDFium does not.
+    
+    Args:
+        source (PdfSource): Path to the PDF file, its bytes, or a binary file object
+        
+    Yields:
+        str: Text of each non-empty page, in page order
+    """
+    with ExitStack() as stack:
+        with _PDFIUM_LOCK:
+            pdf = _open_pdfium(source)
+        stack.callback(_close_pdfium, pdf)
+        with _PDFIUM_LOCK:
+            page_count = len(pdf)
+        plumber_pdf = None
+        
+        for index in range(page_count):
+            with _PDFIUM_LOCK:
+                page = pdf[index]
+                textpage = page.get_textpage()
+                page_text = textpage.get_text_range().replace('\r\n', '\n')
+                textpage.close()
+                page.close()
+            
+            if not page_text.strip():
+                if plumber_pdf is None:
+                    fallback_source = io.BytesIO(source) if isinstance(source, bytes) else source
+                    plumber_pdf = stack.enter_context(pdfplumber.open(fallback_source))
+                plumber_page = plumber_pdf.pages[index]
+                page_text = plumber_page.extract_text()
+                plumber_page.flush_cache()
+            
+            if page_text:
+                yield page_text
 
 
 def extract_text_from_pdf(file_path: str) -> str:
     """
-    Extracts text from a PDF file using pdfplumber.
+    Extracts text from a PDF file using PDFium, falling back to pdfplumber.
     
     Args:
         file_path (str): Path to the PDF file
@@ -12,23 +81,38 @@ def extract_text_from_pdf(file_path: str) -> str:
     Returns:
         str: Extracted text from the PDF
     """
-    text = ""
     try:
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+        parts = list(_iter_page_texts(file_path))
     except Exception as e:
         print(f"Error reading PDF: {str(e)}")
         raise
     
-    return text
+    return "\n".join(parts)
+
+
+def iter_pdf_text(file_path: str) -> Iterator[str]:
+    """
+    Yields the text of a PDF file one page at a time.
+    
+    Each page is released once its text has been read, so only one page
+    is held in memory at a time.
+    
+    Args:
+        file_path (str): Path to the PDF file
+        
+    Yields:
+        str: Text of each non-empty page, in page order
+    """
+    try:
+        yield from _iter_page_texts(file_path)
+    except Exception as e:
+        print(f"Error reading PDF: {str(e)}")
+        raise
 
 
 def extract_text_from_bytes(pdf_bytes: bytes) -> str:
     """
-    Extracts text from PDF bytes using pdfplumber.
+    Extracts text from PDF bytes using PDFium, falling back to pdfplumber.
     
     Args:
         pdf_bytes (bytes): PDF content as bytes
@@ -36,18 +120,13 @@ def extract_text_from_bytes(pdf_bytes: bytes) -> str:
     Returns:
         str: Extracted text from the PDF
     """
-    text = ""
     try:
-        with pdfplumber.open(pdf_bytes) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+        parts = list(_iter_page_texts(pdf_bytes))
     except Exception as e:
         print(f"Error reading PDF from bytes: {str(e)}")
         raise
     
-    return text
+    return "\n".join(parts)
 
 
 def read_file_content(file_path: str) -> str:
@@ -5,6 +5,37 @@ This module provides functions to calculate and update risk scores for loan obli
 based on various factors like type, deadline proximity, and critical keywords.
 """
 
+from bisect import bisect_right
+
+import numpy as np
+
+
+# Base risk by obligation type
+TYPE_MULTIPLIERS = {
+    "Financial Covenant": 1.0,  # Highest risk - affects loan terms directly
+    "Reporting": 0.6,           # Medium risk - compliance requirement
+    "Notification": 0.4         # Lower risk - informational
+}
+
+# Risk level multiplier (from obligation extractor)
+RISK_LEVEL_MULTIPLIERS = {
+    "High": 1.5,
+    "Medium": 1.0,
+    "Low": 0.5
+}
+
+# Additional risk by compliance status; any other status adds DEFAULT_DEADLINE_RISK
+DEADLINE_RISK = {
+    "Missed": 30,     # Significant risk for missed obligations
+    "Due Soon": 15,   # Moderate risk for upcoming deadlines
+    "Compliant": 0    # No additional risk for compliant obligations
+}
+DEFAULT_DEADLINE_RISK = 5  # Default small risk for unknown status
+
+# Scores below RISK_THRESHOLDS[i] fall in RISK_CATEGORIES[i]; the rest are the last category
+RISK_THRESHOLDS = (30, 70)
+RISK_CATEGORIES = ("Low", "Medium", "High")
+
 
 def calculate_risk_score(obligation: dict) -> int:
     """
@@ -16,25 +47,11 @@ def calculate_risk_score(obligation: dict) -> int:
     Returns:
         int: Risk score (0-100) where higher values indicate higher risk
     """
-    base_score = 0
-    
     # Base risk by obligation type
-    type_multipliers = {
-        "Financial Covenant": 1.0,  # Highest risk - affects loan terms directly
-        "Reporting": 0.6,           # Medium risk - compliance requirement
-        "Notification": 0.4         # Lower risk - informational
-    }
-    
-    base_score = type_multipliers.get(obligation.get('type', ''), 0.5) * 50
+    base_score = TYPE_MULTIPLIERS.get(obligation.get('type', ''), 0.5) * 50
     
     # Risk level multiplier (from obligation extractor)
-    risk_level_multipliers = {
-        "High": 1.5,
-        "Medium": 1.0,
-        "Low": 0.5
-    }
-    
-    risk_multiplier = risk_level_multipliers.get(obligation.get('risk_level', 'Medium'), 1.0)
+    risk_multiplier = RISK_LEVEL_MULTIPLIERS.get(obligation.get('risk_level', 'Medium'), 1.0)
     base_score *= risk_multiplier
     
     # Deadline urgency factor
@@ -57,14 +74,7 @@ def calculate_deadline_risk(compliance_status: str) -> int:
     Returns:
         int: Additional risk points based on deadline status
     """
-    if compliance_status == "Missed":
-        return 30  # Significant risk for missed obligations
-    elif compliance_status == "Due Soon":
-        return 15  # Moderate risk for upcoming deadlines
-    elif compliance_status == "Compliant":
-        return 0   # No additional risk for compliant obligations
-    else:
-        return 5   # Default small risk for unknown status
+    return DEADLINE_RISK.get(compliance_status, DEFAULT_DEADLINE_RISK)
 
 
 def categorize_risk_level(score: int) -> str:
@@ -77,12 +87,7 @@ def categorize_risk_level(score: int) -> str:
     Returns:
         str: Risk level category (Low, Medium, High)
     """
-    if score < 30:
-        return "Low"
-    elif score < 70:
-        return "Medium"
-    else:
-        return "High"
+    return RISK_CATEGORIES[bisect_right(RISK_THRESHOLDS, score)]
 
 
 def update_obligation_risks(obligations: list) -> list:
@@ -95,10 +100,18 @@ def update_obligation_risks(obligations: list) -> list:
     Returns:
         list: Updated list of obligations with risk scores
     """
-    for obligation in obligations:
-        risk_score = calculate_risk_score(obligation)
+    # Look up each factor once per obligation, then score the whole batch
+    # with array arithmetic (same formula as calculate_risk_score)
+    type_weights = np.array([TYPE_MULTIPLIERS.get(ob.get('type', ''), 0.5) for ob in obligations], dtype=float)
+    level_weights = np.array([RISK_LEVEL_MULTIPLIERS.get(ob.get('risk_level', 'Medium'), 1.0) for ob in obligations], dtype=float)
+    deadline_risks = np.array([DEADLINE_RISK.get(ob.get('compliance_status', ''), DEFAULT_DEADLINE_RISK) for ob in obligations], dtype=float)
+    
+    risk_scores = np.clip(type_weights * 50 * level_weights + deadline_risks, 0, 100).astype(int)
+    risk_categories = np.array(RISK_CATEGORIES)[np.searchsorted(RISK_THRESHOLDS, risk_scores, side='right')]
+    
+    for obligation, risk_score, risk_category in zip(obligations, risk_scores.tolist(), risk_categories.tolist()):
         obligation['risk_score'] = risk_score
-        obligation['risk_category'] = categorize_risk_level(risk_score)
+        obligation['risk_category'] = risk_category
     
     return obligations
 
@@ -113,7 +126,11 @@ def get_high_risk_obligations(obligations: list) -> list:
     Returns:
         list: List of high-risk obligations
     """
-    return [ob for ob in obligations if categorize_risk_level(calculate_risk_score(ob)) == "High"]
+    # Reuse the category set by update_obligation_risks; only score obligations without one
+    return [
+        ob for ob in obligations
+        if (ob.get('risk_category') or categorize_risk_level(calculate_risk_score(ob))) == "High"
+    ]
 
 
 def get_upcoming_deadlines(obligations: list, days_ahead: int = 14) -> list: